@@ -1,30 +1,87 @@
+import functools
 import operator
+from array import array
 from dataclasses import dataclass
 from typing import Callable
+from typing import Iterable
+from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import Union
+from weakref import WeakValueDictionary
+
+# cached in place of a result that is the node itself (see _cached_on_node)
+_SELF = object()
+
+
+def _cached_on_node(method: Callable) -> Callable:
+    """
+    cache the result of a no-argument method on the (immutable) node itself
+    bypasses the frozen dataclass __setattr__, since the cached value is not a field
+    a result that is the node itself is cached as _SELF, so that the node does not reference itself
+    (which would leave it for the cyclic garbage collector instead of freeing it by reference counting)
+    """
+    attr = f'_cached_{method.__name__}'
+
+    @functools.wraps(method)
+    def wrapper(self):
+        try:
+            result = self.__dict__[attr]
+        except KeyError:
+            result = method(self)
+            object.__setattr__(self, attr, _SELF if result is self else result)
+            return result
+        return self if result is _SELF else result
+
+    return wrapper
+
+
+# hash-consing pools for nodes built by the tree operations, so that identical subtrees are shared
+# IDTuples are keyed on their halves, since IDTuple equality is structural and its hash is cached
+# Events are keyed on the ids of their tops instead, since Event equality is looser than structural identity
+# (the ids are safe because a pooled node keeps its children alive)
+_id_tuple_pool: WeakValueDictionary = WeakValueDictionary()
+_event_pool: WeakValueDictionary = WeakValueDictionary()
+
+# the two instances of IDInteger, keyed on their value
+_id_integers: dict = dict()
 
 
 @dataclass(frozen=True)
 class IDInteger:
     value: int = 1
 
-    def __post_init__(self):
+    def __new__(cls, value: int = 1) -> 'IDInteger':
         # type check
-        if not isinstance(self.value, int):
-            raise TypeError(self.value)
+        if not isinstance(value, int):
+            raise TypeError(value)
 
         # only allowed values are 1 and 0, representing the full and empty interval respectively
-        if self.value not in {1, 0}:
-            raise ValueError(self.value)
+        if value not in {1, 0}:
+            raise ValueError(value)
+
+        # there are only ever two instances (ID_ONE and ID_ZERO), so that they can be checked by identity
+        instance = _id_integers.get(value)
+        if instance is None:
+            instance = _id_integers[value] = super().__new__(cls)
+            object.__setattr__(instance, 'value', int(value))
+        return instance
+
+    def __init__(self, value: int = 1):
+        # already done in __new__, and the shared instances must not be modified
+        pass
+
+    def __reduce__(self):
+        # copy and pickle through __new__, so that they return the shared instances
+        return IDInteger, (self.value,)
 
     def fork(self) -> Union[Tuple['IDInteger', 'IDInteger'], Tuple['IDTuple', 'IDTuple']]:
 
         # the full interval splits into two half intervals
         # (1) -> [(1, 0), (0, 1)]
-        if self.value:
-            return IDTuple(self, IDInteger(0)), IDTuple(IDInteger(0), self)
+        if self is ID_ONE:
+            return IDTuple._intern(self, ID_ZERO), IDTuple._intern(ID_ZERO, self)
 
         # the empty interval cannot be forked
         else:
@@ -39,7 +96,7 @@ class IDInteger:
 
         # a full interval joined to anything returns a full interval
         # (1) + (...) -> (1)
-        if self.value:
+        if self is ID_ONE:
             return self
 
         # an empty interval joined to anything returns the other thing
@@ -56,7 +113,12 @@ class IDInteger:
     def __bool__(self) -> bool:
         # (1) -> Truthy
         # (0) -> Falsy
-        return bool(self.value)
+        return self is ID_ONE
+
+
+# the only two possible IDIntegers, which IDInteger(...) always returns
+ID_ZERO = IDInteger(0)
+ID_ONE = IDInteger(1)
 
 
 @dataclass(frozen=True)
@@ -75,72 +137,188 @@ class IDTuple:
         if not self:
             raise TypeError((self.left, self.right))
 
+        # cache the hash (see __hash__)
+        object.__setattr__(self, '_hash', hash((self.left, self.right)))
+
+    @classmethod
+    def _unchecked(cls, left: Union[IDInteger, 'IDTuple'], right: Union[IDInteger, 'IDTuple']) -> 'IDTuple':
+        # skips validation, only to be used where the halves are known to be valid and not both empty
+        unchecked = cls.__new__(cls)
+        object.__setattr__(unchecked, 'left', left)
+        object.__setattr__(unchecked, 'right', right)
+        object.__setattr__(unchecked, '_hash', hash((left, right)))
+        return unchecked
+
+    @classmethod
+    def _intern(cls, left: Union[IDInteger, 'IDTuple'], right: Union[IDInteger, 'IDTuple']) -> 'IDTuple':
+        # same as _unchecked, but reuses an existing IDTuple with the same halves if there is one
+        key = (left, right)
+        interned = _id_tuple_pool.get(key)
+        if interned is None:
+            interned = _id_tuple_pool[key] = cls._unchecked(left, right)
+        return interned
+
+    def __hash__(self) -> int:
+        # computed once on construction from the cached hashes of the halves, instead of walking the whole tree
+        return self._hash
+
     def fork(self) -> Tuple[Union[IDInteger, 'IDTuple'], Union[IDInteger, 'IDTuple']]:
+        # walk down (using a loop instead of recursion) to the node that gets split, remembering the path taken
+        path = []
+        node = self
+        while node.__class__ is IDTuple and not (node.left and node.right):
+            # if only left is non-zero, fork the left side
+            # (x, 0) -> [(x1, 0), (x2, 0)]
+            #           where [x1, x2] = x.fork()
+            if node.left:
+                path.append(True)
+                node = node.left
+
+            # if only right is non-zero, for the right side
+            # (0, y) -> [(0, y1), (0, y2)]
+            #           where [y1, y2] = y.fork()
+            elif node.right:
+                path.append(False)
+                node = node.right
+
+            # this should never happen because an empty IDTuple should not exist
+            else:
+                # if it was allowed, it should behave the same as IDInteger(0).fork()
+                # (0, 0) -> [(0), (0)]
+                # return IDInteger(0), IDInteger(0)
+                raise ZeroDivisionError(node)
+
         # if both left and right are non-zero, just split
         # (x, y) -> (x, 0), (0, y)
-        if self.left and self.right:
-            return IDTuple(self.left, IDInteger(0)), IDTuple(IDInteger(0), self.right)
-
-        # if only left is non-zero, fork the left side
-        # (x, 0) -> [(x1, 0), (x2, 0)]
-        #           where [x1, x2] = x.fork()
-        elif self.left:
-            left_1, left_2 = self.left.fork()
-            return IDTuple(left_1, IDInteger(0)), IDTuple(left_2, IDInteger(0))
-
-        # if only right is non-zero, for the right side
-        # (0, y) -> [(0, y1), (0, y2)]
-        #           where [y1, y2] = y.fork()
-        elif self.right:
-            right_1, right_2 = self.right.fork()
-            return IDTuple(IDInteger(0), right_1), IDTuple(IDInteger(0), right_2)
-
-        # this should never happen because an empty IDTuple should not exist
+        if node.__class__ is IDTuple:
+            forked_1, forked_2 = IDTuple._intern(node.left, ID_ZERO), IDTuple._intern(ID_ZERO, node.right)
+
+        # a full interval splits into two halves
         else:
-            # if it was allowed, it should behave the same as IDInteger(0).fork()
-            # (0, 0) -> [(0), (0)]
-            # return IDInteger(0), IDInteger(0)
-            raise ZeroDivisionError(self)
+            forked_1, forked_2 = node.fork()
 
-    def join(self, other: Union['IDInteger', 'IDTuple']) -> Union[IDInteger, 'IDTuple']:
-        # joining to either a full or empty interval
-        if isinstance(other, IDInteger):
-            # (x, y) + (1) -> (1)
-            if other.value:
-                return other
+        # rebuild the path back up to the root
+        for is_left in reversed(path):
+            if is_left:
+                forked_1, forked_2 = IDTuple._intern(forked_1, ID_ZERO), IDTuple._intern(forked_2, ID_ZERO)
+            else:
+                forked_1, forked_2 = IDTuple._intern(ID_ZERO, forked_1), IDTuple._intern(ID_ZERO, forked_2)
 
-            # (x, y) + (0) -> (x, y)
+        return forked_1, forked_2
+
+    def join(self, other: Union['IDInteger', 'IDTuple']) -> Union[IDInteger, 'IDTuple']:
+        # walk both trees together using a stack instead of recursion
+        # each pair of (structurally equal) nodes is joined once, after both pairs of halves have been joined
+        # two IDTuples are joined in their normal forms (which are cached), so that the result is normalized
+        # as it is built, instead of normalizing all of it again afterwards
+        root = (self, other)
+        if other.__class__ is IDTuple:
+            root = (self.normalize(), other.normalize())
+
+        joined = dict()
+        stack = [(*root, False)]
+        while stack:
+            _self, _other, halves_joined = stack.pop()
+            key = (_self, _other)
+            if key in joined:
+                continue
+            other_class = _other.__class__
+
+            # joining a full or empty interval to anything
+            if _self.__class__ is IDInteger:
+                joined[key] = _self.join(_other)
+
+            # joining to itself
+            elif _self is _other:
+                joined[key] = _self
+
+            # joining to either a full or empty interval
+            elif other_class is IDInteger:
+                # (x, y) + (1) -> (1)
+                if _other is ID_ONE:
+                    joined[key] = _other
+
+                # (x, y) + (0) -> (x, y)
+                else:
+                    joined[key] = _self
+
+            # wrong type
+            elif other_class is not IDTuple:
+                raise TypeError(_other)
+
+            # join left and right halves separately first
+            elif not halves_joined:
+                stack.append((_self, _other, True))
+                stack.append((_self.right, _other.right, False))
+                stack.append((_self.left, _other.left, False))
+
+            # then combine the halves, which are already normalized
+            # (x, y) + (a, b) -> (x + a, y + b)
             else:
-                return self
+                left = joined[_self.left, _other.left]
+                right = joined[_self.right, _other.right]
 
-        # join left and right halves separately, then normalize
-        # (x, y) + (a, b) -> (x + a, y + b)
-        elif isinstance(other, IDTuple):
-            return IDTuple(self.left.join(other.left), self.right.join(other.right)).normalize()
+                # merge into a full interval if both halves are full
+                # (1, 1) -> 1
+                if left is right and left.__class__ is IDInteger:
+                    joined[key] = left
+                else:
+                    combined = joined[key] = IDTuple._intern(left, right)
+                    object.__setattr__(combined, '_cached_normalize', _SELF)
 
-        # wrong type
-        else:
-            raise TypeError(other)
+        return joined[root]
 
     def normalize(self) -> Union[IDInteger, 'IDTuple']:
-        # normalize both halves
-        left = self.left.normalize()
-        right = self.right.normalize()
+        # walk the tree in post-order using a stack instead of recursion
+        # the normal form of each node is cached on the node, and an IDInteger is its own normal form
+        # a node that is its own normal form caches _SELF instead of a reference to itself (see _cached_on_node)
+        stack = [self]
+        while stack:
+            node = stack[-1]
+            if '_cached_normalize' in node.__dict__:
+                stack.pop()
+                continue
+
+            # normalize both halves first
+            pending = [half for half in (node.left, node.right)
+                       if half.__class__ is IDTuple and '_cached_normalize' not in half.__dict__]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            left = node.left.__dict__.get('_cached_normalize', _SELF)
+            if left is _SELF:
+                left = node.left
+            right = node.right.__dict__.get('_cached_normalize', _SELF)
+            if right is _SELF:
+                right = node.right
+
+            # merge into a full or empty interval if both halves are full or empty
+            # (0, 0) -> 0
+            # (1, 1) -> 1
+            if left is right and left.__class__ is IDInteger:
+                normalized = left
+
+            # already normalized, no need to make a copy
+            elif left is node.left and right is node.right:
+                normalized = node
+
+            # otherwise, use a new IDTuple with both halves normalized
+            else:
+                normalized = IDTuple._intern(left, right)
+                object.__setattr__(normalized, '_cached_normalize', _SELF)
 
-        # merge into a full or empty interval if both halves are full or empty
-        # (0, 0) -> 0
-        # (1, 1) -> 1
-        if isinstance(left, IDInteger) and isinstance(right, IDInteger):
-            if left.value == right.value:
-                return left
+            object.__setattr__(node, '_cached_normalize', _SELF if normalized is node else normalized)
 
-        # otherwise, return a new IDTuple with both halves normalized
-        return IDTuple(left, right)
+        normalized = self.__dict__['_cached_normalize']
+        return self if normalized is _SELF else normalized
 
     def __bool__(self) -> bool:
         # Truthy if either side is Truthy
         # Falsy if and only if both sides are Falsy
-        return bool(self.left) or bool(self.right)
+        # an IDTuple can never be empty, so there is no need to recurse into one
+        return self.left.__class__ is IDTuple or self.right.__class__ is IDTuple or bool(self.left) or bool(self.right)
 
 
 @dataclass(frozen=True, eq=False)
@@ -170,8 +348,27 @@ class Event:
             if not self.top_right:
                 raise ValueError(self.top_right)  # should be None
 
+    @classmethod
+    def _unchecked(cls, base: int, top_left: Optional['Event'] = None, top_right: Optional['Event'] = None) -> 'Event':
+        # skips validation, only to be used where the base and (non-empty) tops are known to be valid
+        unchecked = cls.__new__(cls)
+        object.__setattr__(unchecked, 'base', base)
+        object.__setattr__(unchecked, 'top_left', top_left)
+        object.__setattr__(unchecked, 'top_right', top_right)
+        return unchecked
+
+    @classmethod
+    def _intern(cls, base: int, top_left: Optional['Event'] = None, top_right: Optional['Event'] = None) -> 'Event':
+        # same as _unchecked, but reuses an existing Event with the same base and tops if there is one
+        key = (base, id(top_left), id(top_right))
+        interned = _event_pool.get(key)
+        if interned is None:
+            interned = _event_pool[key] = cls._unchecked(base, top_left, top_right)
+        return interned
+
     @property
-    def height(self):
+    @_cached_on_node
+    def height(self) -> int:
         if self.top_left and self.top_right:
             return self.base + max(self.top_left.height, self.top_right.height)
         elif self.top_left:
@@ -182,7 +379,8 @@ class Event:
             return self.base
 
     @property
-    def complexity(self):
+    @_cached_on_node
+    def complexity(self) -> int:
         # complexity cost to have a tuple of 3 items
         _overhead = 4  # need the following 4 chars for a tuple of 3 items: ( , , )
 
@@ -201,44 +399,77 @@ class Event:
     def __bool__(self):
         if self.base:
             return True
-        if self.top_left:
+        # tops are never empty, so there is no need to recurse into them
+        if self.top_left is not None:
             return True
-        if self.top_right:
+        if self.top_right is not None:
             return True
         return False
 
     def __eq__(self, other: 'Event'):
+        # not comparable, rather than an error, since an Event is hashable and may share a container with anything
         if not isinstance(other, Event):
-            raise TypeError(other)
+            return NotImplemented
 
-        _self = self.normalize()
-        _other = other.normalize()
+        if self is other:
+            return True
+
+        # with the same tops, the normalized events can only differ by their base
+        if self.top_left is other.top_left and self.top_right is other.top_right:
+            return self.base == other.base
+
+        # equal events have structurally identical normal forms (which are cached), so compare those
+        # walk both trees together using a stack instead of recursion
+        stack = [(self.normalize(), other.normalize())]
+        while stack:
+            _self, _other = stack.pop()
+            if _self is _other:
+                continue
+
+            # a top that is missing on only one side, since normalized tops are never empty
+            if _self is None or _other is None:
+                return False
+
+            if _self.base != _other.base:
+                return False
+            stack.append((_self.top_right, _other.top_right))
+            stack.append((_self.top_left, _other.top_left))
 
-        if _self.base != _other.base:
-            return False
-        if _self.top_left != _other.top_left:
-            return False
-        if _self.top_right != _other.top_right:
-            return False
         return True
 
+    def __hash__(self) -> int:
+        # consistent with __eq__, since equal events have structurally identical normal forms
+        return self.normalize()._structural_hash
+
+    @property
+    @_cached_on_node
+    def _structural_hash(self) -> int:
+        # merkle-style hash, computed once per node from the cached hashes of the tops
+        return hash((self.base,
+                     self.top_left._structural_hash if self.top_left is not None else 0,
+                     self.top_right._structural_hash if self.top_right is not None else 0,
+                     ))
+
     def __compare(self, other: 'Event', op: Callable = operator.le):
         if not isinstance(other, Event):
             raise TypeError(other)
 
-        _self = self.normalize()
-        _other = other.normalize()
-
-        if not op(_self.base, _other.base):
-            return False
+        # walk both trees together using a stack instead of recursion
+        # the offset lifts each top of self to the height at which the corresponding top of other starts,
+        # which is the same as calling offset_base, but without building the offset events
+        stack = [(self.normalize(), other.normalize(), 0)]
+        while stack:
+            _self, _other, offset = stack.pop()
 
-        if _self.top_left:
-            if not op(_self.top_left.offset_base(_self.base - _other.base), (_other.top_left or Event())):
+            base = _self.base + offset
+            if not op(base, _other.base):
                 return False
 
-        if _self.top_right:
-            if not op(_self.top_right.offset_base(_self.base - _other.base), (_other.top_right or Event())):
-                return False
+            offset = base - _other.base
+            if _self.top_right:
+                stack.append((_self.top_right, _other.top_right or _EMPTY_EVENT, offset))
+            if _self.top_left:
+                stack.append((_self.top_left, _other.top_left or _EMPTY_EVENT, offset))
 
         return True
 
@@ -256,21 +487,22 @@ class Event:
 
     def fill(self, interval: Union[IDInteger, IDTuple]):
         # note: does not intelligently fill to height of other things
+        interval_class = interval.__class__
 
-        if isinstance(interval, IDInteger):
-            if interval.value == 1:
-                return Event(self.height)
+        if interval_class is IDInteger:
+            if interval is ID_ONE:
+                return Event._intern(self.height)
             else:
                 return self
 
-        elif isinstance(interval, IDTuple):
+        elif interval_class is IDTuple:
             top_left = self.top_left
             top_right = self.top_right
             if top_left:
-                top_left = top_left.fill(IDTuple.left)
+                top_left = top_left.fill(interval.left)
             if top_right:
-                top_right = top_right.fill(IDTuple.right)
-            return Event(self.base, top_left, top_right).normalize()
+                top_right = top_right.fill(interval.right)
+            return Event._intern(self.base, top_left, top_right).normalize()
 
         else:
             raise TypeError(interval)
@@ -281,33 +513,46 @@ class Event:
         elif amount <= 0:
             raise ValueError(amount)
 
-        if isinstance(interval, IDInteger):
-            if interval.value == 1:
-                return Event(self.height + amount)
+        # the amount is checked once here, instead of on every recursive call
+        return self.__grow(interval, amount)
+
+    def __grow(self, interval: Union[IDInteger, IDTuple], amount: int):
+        interval_class = interval.__class__
+
+        if interval_class is IDInteger:
+            if interval is ID_ONE:
+                return Event._intern(self.height + amount)
             else:
                 return self
 
-        elif isinstance(interval, IDTuple):
+        elif interval_class is IDTuple:
             if interval.left and interval.right:
-                top_left = (self.top_left or Event()).grow(interval.left, amount)
-                top_right = (self.top_right or Event()).grow(interval.right, amount)
+                top_left = (self.top_left or _EMPTY_EVENT).__grow(interval.left, amount)
+                top_right = (self.top_right or _EMPTY_EVENT).__grow(interval.right, amount)
+
+                # only build whichever of grow_left, grow_right, or grow_both is the cheapest
+                # compare (complexity, height) as scalars, where the earlier candidate wins a tie
+                complexity, height = self.__normalized_cost(self.base, top_left, self.top_right)
+                best_top_left, best_top_right = top_left, self.top_right
+
+                complexity_right, height_right = self.__normalized_cost(self.base, self.top_left, top_right)
+                if complexity_right < complexity or (complexity_right == complexity and height_right < height):
+                    complexity, height = complexity_right, height_right
+                    best_top_left, best_top_right = self.top_left, top_right
 
-                grow_left = Event(self.base, top_left, self.top_right).normalize()
-                grow_right = Event(self.base, self.top_left, top_right).normalize()
-                grow_both = Event(self.base, top_left, top_right).normalize()
+                complexity_both, height_both = self.__normalized_cost(self.base, top_left, top_right)
+                if complexity_both < complexity or (complexity_both == complexity and height_both < height):
+                    best_top_left, best_top_right = top_left, top_right
 
-                return min([(grow_left.complexity, grow_left.height, grow_left),
-                            (grow_right.complexity, grow_right.height, grow_right),
-                            (grow_both.complexity, grow_both.height, grow_both),
-                            ], key=lambda x: x[:2])[-1]
+                return Event._intern(self.base, best_top_left, best_top_right).normalize()
 
             elif interval.left:
-                top_left = (self.top_left or Event()).grow(interval.left, amount)
-                return Event(self.base, top_left, self.top_right).normalize()
+                top_left = (self.top_left or _EMPTY_EVENT).__grow(interval.left, amount)
+                return Event._intern(self.base, top_left, self.top_right).normalize()
 
             elif interval.right:
-                top_right = (self.top_right or Event()).grow(interval.right, amount)
-                return Event(self.base, self.top_left, top_right).normalize()
+                top_right = (self.top_right or _EMPTY_EVENT).__grow(interval.right, amount)
+                return Event._intern(self.base, self.top_left, top_right).normalize()
 
             else:
                 raise RuntimeError  # this can never happen
@@ -315,36 +560,72 @@ class Event:
         else:
             raise TypeError(interval)
 
+    @staticmethod
+    def __normalized_cost(base: int, top_left: Optional['Event'], top_right: Optional['Event']) -> Tuple[int, int]:
+        """
+        (complexity, height) of Event(base, top_left, top_right).normalize(), without building it
+        normalizing only ever moves the smaller base of the tops down, which leaves the complexity unchanged
+        unless both tops are flat and equal, in which case they merge into the base
+        """
+        if top_left is not None and top_right is not None:
+            top_left = top_left.normalize()
+            top_right = top_right.normalize()
+            if top_left.base == top_right.base \
+                    and top_left.top_left is None and top_left.top_right is None \
+                    and top_right.top_left is None and top_right.top_right is None:
+                return 1, base + top_left.base
+            return 5 + top_left.complexity + top_right.complexity, base + max(top_left.height, top_right.height)
+
+        elif top_left is not None or top_right is not None:
+            top = (top_left or top_right).normalize()
+            return 6 + top.complexity, base + top.height
+
+        else:
+            return 1, base
+
     def join(self, other: 'Event'):
         if not isinstance(other, Event):
             raise TypeError(other)
 
-        if not self:
-            return other
-        elif not other:
-            return self
-        elif self.base < other.base:
-            return other.join(self)
+        # join the normal forms (which are cached), so that the result is normalized as it is built
+        # the tops of a normal form are normalized, and offset_base keeps them that way
+        _self = self.normalize()
+        _other = other.normalize()
 
-        if self.top_left and other.top_left:
-            top_left = self.top_left.join(other.top_left.offset_base(other.base - self.base))
-        elif self.top_left:
-            top_left = self.top_left
-        elif other.top_left:
-            top_left = other.top_left.offset_base(other.base - self.base)
+        # a flat event that is no higher than the base of the other event is absorbed, without building anything
+        # this covers joining small clocks, which are often flat
+        if _other.top_left is None and _other.top_right is None and _other.base <= _self.base:
+            return _self
+        elif _self.top_left is None and _self.top_right is None and _self.base <= _other.base:
+            return _other
+
+        if not _self:
+            return _other
+        elif not _other:
+            return _self
+        elif _self.base < _other.base:
+            return _other.join(_self)
+
+        if _self.top_left and _other.top_left:
+            top_left = _self.top_left.join(_other.top_left.offset_base(_other.base - _self.base))
+        elif _self.top_left:
+            top_left = _self.top_left
+        elif _other.top_left:
+            top_left = _other.top_left.offset_base(_other.base - _self.base)
         else:
             top_left = None
 
-        if self.top_right and other.top_right:
-            top_right = self.top_right.join(other.top_right.offset_base(other.base - self.base))
-        elif other.top_right:
-            top_right = other.top_right.offset_base(other.base - self.base)
-        elif self.top_right:
-            top_right = self.top_right
+        if _self.top_right and _other.top_right:
+            top_right = _self.top_right.join(_other.top_right.offset_base(_other.base - _self.base))
+        elif _other.top_right:
+            top_right = _other.top_right.offset_base(_other.base - _self.base)
+        elif _self.top_right:
+            top_right = _self.top_right
         else:
             top_right = None
 
-        return Event(self.base, top_left or None, top_right or None)
+        # only the base is left to normalize
+        return Event._normalized(_self.base, top_left or None, top_right or None)
 
     def offset_base(self, distance: int) -> 'Event':
         base = self.base + distance
@@ -354,11 +635,11 @@ class Event:
         # you can depress the base below zero to lower the top parts
         if base < 0:
             if self.top_left:
-                top_left = top_left.offset_base(top_left.base + base) or None
+                top_left = top_left.offset_base(base) or None
             if self.top_right:
-                top_right = top_right.offset_base(top_right.base + base) or None
+                top_right = top_right.offset_base(base) or None
             base = 0
-        return Event(base, top_left, top_right)
+        return Event._intern(base, top_left, top_right)
 
     def replace(self,
                 base: Optional[int] = None,
@@ -374,29 +655,367 @@ class Event:
 
         return Event(base, top_left or None, top_right or None)
 
+    @_cached_on_node
     def normalize(self) -> 'Event':
         # already normalized
         if self.top_left is None and self.top_right is None:
             return self
 
-        # normalize top left
-        elif self.top_left is not None and self.top_right is None:
-            return Event(self.base, self.top_left.normalize(), None)
+        # normalize both tops recursively
+        top_left = self.top_left.normalize() if self.top_left is not None else None
+        top_right = self.top_right.normalize() if self.top_right is not None else None
 
-        # normalize top right
-        elif self.top_left is None:
-            return Event(self.base, None, self.top_right.normalize())
+        # already normalized, no need to make a copy
+        if top_left is self.top_left and top_right is self.top_right:
+            if top_left is None or top_right is None or not min(top_left.base, top_right.base):
+                return self
 
-        # normalize both recursively
-        else:
-            top_left = self.top_left.normalize()
-            top_right = self.top_right.normalize()
+        return Event._normalized(self.base, top_left, top_right)
+
+    @classmethod
+    def _normalized(cls, base: int, top_left: Optional['Event'], top_right: Optional['Event']) -> 'Event':
+        # normal form of Event(base, top_left, top_right), where the tops are already normalized and not empty
+        if top_left is not None and top_right is not None:
             denominator = min(top_left.base, top_right.base)
 
-            # move denominator to base
-            base = self.base + denominator
-            top_left = top_left.replace(base=top_left.base - denominator)
-            top_right = top_right.replace(base=top_right.base - denominator)
+            # move denominator to base, and replace with None if it's an empty event
+            if denominator:
+                base += denominator
+                top_left = cls._intern(top_left.base - denominator, top_left.top_left, top_left.top_right) or None
+                top_right = cls._intern(top_right.base - denominator, top_right.top_left, top_right.top_right) or None
+
+        # the normalized event is its own normal form
+        normalized = cls._intern(base, top_left, top_right)
+        object.__setattr__(normalized, '_cached_normalize', _SELF)
+        return normalized
+
+    def to_arrays(self) -> Tuple[array, array, array]:
+        """
+        flatten into three parallel int64 arrays of (base, top_left, top_right) in pre-order, with the root at 0
+        tops are the indices of other nodes in the same arrays, or -1 if missing
+        """
+        base, top_left, top_right = array('q'), array('q'), array('q')
+        _flatten_into(self, base, top_left, top_right)
+        return base, top_left, top_right
+
+    @classmethod
+    def from_arrays(cls, base, top_left, top_right, root: int = 0) -> 'Event':
+        """
+        inverse of to_arrays, accepts any indexable arrays where tops are stored after their parents
+        nodes that are unreachable from the root are ignored
+        """
+        # collect reachable nodes in pre-order, then build them bottom-up so that the tops already exist
+        order = []
+        stack = [root]
+        while stack:
+            index = stack.pop()
+            order.append(index)
+            if top_right[index] >= 0:
+                stack.append(top_right[index])
+            if top_left[index] >= 0:
+                stack.append(top_left[index])
+
+        events = dict()
+        for index in reversed(order):
+            events[index] = cls(int(base[index]), events.get(top_left[index]), events.get(top_right[index]))
+        return events[root]
+
+
+# shared empty event, used in place of a missing top instead of constructing a new Event()
+# this is safe because events are immutable, and it is still Falsy like any other empty event
+_EMPTY_EVENT = Event()
+
+
+def _flatten_into(event: Event, base: array, top_left: array, top_right: array) -> int:
+    """
+    append the nodes of an event to the arrays in pre-order (see Event.to_arrays)
+    returns the index of the root, so that several events can share the same arrays
+    """
+    root = len(base)
+    stack = [(event, -1, True)]
+    while stack:
+        node, parent, is_left = stack.pop()
+        index = len(base)
+        base.append(node.base)
+        top_left.append(-1)
+        top_right.append(-1)
+        if parent >= 0:
+            if is_left:
+                top_left[parent] = index
+            else:
+                top_right[parent] = index
+
+        if node.top_right is not None:
+            stack.append((node.top_right, index, False))
+        if node.top_left is not None:
+            stack.append((node.top_left, index, True))
 
-            # replace with None if it's an empty event
-            return Event(base, top_left or None, top_right or None)
+    return root
+
+
+def _buffer(size: int) -> array:
+    # zeroed int64 array, for the outputs and stacks of the array kernels (which must not allocate under numba)
+    return array('q', bytes(8 * size))
+
+
+# the array kernels below work on the flattened (base, top_left, top_right) representation of Event.to_arrays
+# they use explicit stacks instead of recursion, so that numba can compile them (see _jit_array_kernels)
+
+def _leq_arrays(base_a, top_left_a, top_right_a, root_a, base_b, top_left_b, top_right_b, root_b, stack):
+    # same as Event.__le__, where a missing top in b is stored as -1 and treated as an empty event
+    # b must be normalized (see _normalize_arrays), since a base of b is taken to be the lowest point under it
+    # the stack needs 3 slots per node of a
+    stack[0] = root_a
+    stack[1] = root_b
+    stack[2] = 0
+    size = 1
+    while size:
+        size -= 1
+        index_a = stack[3 * size]
+        index_b = stack[3 * size + 1]
+        offset = stack[3 * size + 2]
+
+        value_a = base_a[index_a] + offset
+        value_b = base_b[index_b] if index_b >= 0 else 0
+        if value_a > value_b:
+            return False
+        offset = value_a - value_b
+
+        if top_left_a[index_a] >= 0:
+            stack[3 * size] = top_left_a[index_a]
+            stack[3 * size + 1] = top_left_b[index_b] if index_b >= 0 else -1
+            stack[3 * size + 2] = offset
+            size += 1
+        if top_right_a[index_a] >= 0:
+            stack[3 * size] = top_right_a[index_a]
+            stack[3 * size + 1] = top_right_b[index_b] if index_b >= 0 else -1
+            stack[3 * size + 2] = offset
+            size += 1
+
+    return True
+
+
+def _join_arrays(base_a, top_left_a, top_right_a, root_a, base_b, top_left_b, top_right_b, root_b,
+                 out_base, out_top_left, out_top_right, stack):
+    # same as Event.join (before normalizing), writes the result to the out arrays in pre-order with the root at 0
+    # each node of the result takes the larger base of both sides, and the deficit of the lower side is carried down,
+    # which is the same as offset_base, except that no intermediate events are built
+    # a missing top is stored as -1 and treated as an empty event
+    # the out arrays need as many slots as both inputs together, and the stack needs 6 slots per slot of the output
+    # returns the number of nodes written
+    stack[0] = root_a
+    stack[1] = 0
+    stack[2] = root_b
+    stack[3] = 0
+    stack[4] = -1
+    stack[5] = 0
+    size = 1
+    count = 0
+    while size:
+        size -= 1
+        index_a = stack[6 * size]
+        value_a = stack[6 * size + 1]
+        index_b = stack[6 * size + 2]
+        value_b = stack[6 * size + 3]
+        parent = stack[6 * size + 4]
+        is_left = stack[6 * size + 5]
+
+        # the carried deficit (zero or less) plus the base, which is floored at zero
+        if index_a >= 0:
+            value_a += base_a[index_a]
+        if index_b >= 0:
+            value_b += base_b[index_b]
+        value = max(value_a, value_b, 0)
+
+        index = count
+        count += 1
+        out_base[index] = value
+        out_top_left[index] = -1
+        out_top_right[index] = -1
+        if parent >= 0:
+            if is_left:
+                out_top_left[parent] = index
+            else:
+                out_top_right[parent] = index
+
+        # push right before left, so that the output is written in pre-order
+        top_a = top_right_a[index_a] if index_a >= 0 else -1
+        top_b = top_right_b[index_b] if index_b >= 0 else -1
+        if top_a >= 0 or top_b >= 0:
+            stack[6 * size] = top_a
+            stack[6 * size + 1] = value_a - value
+            stack[6 * size + 2] = top_b
+            stack[6 * size + 3] = value_b - value
+            stack[6 * size + 4] = index
+            stack[6 * size + 5] = 0
+            size += 1
+
+        top_a = top_left_a[index_a] if index_a >= 0 else -1
+        top_b = top_left_b[index_b] if index_b >= 0 else -1
+        if top_a >= 0 or top_b >= 0:
+            stack[6 * size] = top_a
+            stack[6 * size + 1] = value_a - value
+            stack[6 * size + 2] = top_b
+            stack[6 * size + 3] = value_b - value
+            stack[6 * size + 4] = index
+            stack[6 * size + 5] = 1
+            size += 1
+
+    return count
+
+
+def _normalize_arrays(base, top_left, top_right, size):
+    # same as Event.normalize, but in place on the first `size` nodes, which must have their tops stored after them
+    # walks backwards, so that both tops are already normalized when their parent is reached
+    # tops that become empty are unlinked, and the nodes they point to are left unreachable
+    for index in range(size - 1, -1, -1):
+        left = top_left[index]
+        right = top_right[index]
+
+        # move the smaller base of both tops down to the parent
+        if left >= 0 and right >= 0:
+            lifted = min(base[left], base[right])
+            base[index] += lifted
+            base[left] -= lifted
+            base[right] -= lifted
+
+        # replace with -1 if it's an empty event
+        if left >= 0 and base[left] == 0 and top_left[left] < 0 and top_right[left] < 0:
+            top_left[index] = -1
+        if right >= 0 and base[right] == 0 and top_left[right] < 0 and top_right[right] < 0:
+            top_right[index] = -1
+
+
+def _join_many_arrays(base, top_left, top_right, roots, out_base, out_top_left, out_top_right,
+                      scratch_base, scratch_top_left, scratch_top_right, stack):
+    # same as _join_arrays, but folds every root (at least 2) of the input arrays into the out arrays
+    # the out and scratch arrays need as many slots as the input, and the stack needs 6 slots per slot of the input
+    # returns the number of nodes written
+    count = _join_arrays(base, top_left, top_right, roots[0], base, top_left, top_right, roots[1],
+                         out_base, out_top_left, out_top_right, stack)
+
+    # ping-pong between the out and scratch arrays, joining the next root into the previous result
+    in_out = True
+    for i in range(2, len(roots)):
+        if in_out:
+            count = _join_arrays(out_base, out_top_left, out_top_right, 0, base, top_left, top_right, roots[i],
+                                 scratch_base, scratch_top_left, scratch_top_right, stack)
+        else:
+            count = _join_arrays(scratch_base, scratch_top_left, scratch_top_right, 0, base, top_left, top_right,
+                                 roots[i], out_base, out_top_left, out_top_right, stack)
+        in_out = not in_out
+
+    if not in_out:
+        for index in range(count):
+            out_base[index] = scratch_base[index]
+            out_top_left[index] = scratch_top_left[index]
+            out_top_right[index] = scratch_top_right[index]
+
+    return count
+
+
+def _leq_many_arrays(base_a, top_left_a, top_right_a, roots_a, base_b, top_left_b, top_right_b, roots_b, out, stack):
+    # same as _leq_arrays for each pair of roots, writing 1 (True) or 0 (False) to out
+    for i in range(len(roots_a)):
+        out[i] = _leq_arrays(base_a, top_left_a, top_right_a, roots_a[i],
+                             base_b, top_left_b, top_right_b, roots_b[i], stack)
+
+
+# numba is optional, and is only imported on the first batch call, since importing it is slow
+# None until then, and afterwards whether the array kernels were compiled
+_numba_available: Optional[bool] = None
+
+
+def _jit_array_kernels() -> bool:
+    """
+    compile the array kernels with numba (if it is installed) the first time they are needed
+    the compiled kernels replace the plain python ones in this module, since the kernels that call other kernels
+    look them up from the module when they are compiled, and they are cached on disk to skip compiling next time
+    """
+    global _numba_available
+    if _numba_available is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _numba_available = False
+        else:
+            for name in ('_leq_arrays', '_join_arrays', '_normalize_arrays', '_join_many_arrays', '_leq_many_arrays'):
+                globals()[name] = njit(cache=True)(globals()[name])
+            _numba_available = True
+    return _numba_available
+
+
+def batch_join(events: Iterable[Event]) -> Event:
+    """
+    join many events at once, same as functools.reduce(Event.join, events, Event())
+    flattens all the events into one set of arrays, so that the whole fold runs in the array kernels
+    this only pays off with numba installed, without it this is just functools.reduce (which is faster than
+    running the kernels as plain python)
+    """
+    if not _jit_array_kernels():
+        return functools.reduce(Event.join, events, _EMPTY_EVENT)
+
+    base, top_left, top_right = array('q'), array('q'), array('q')
+    roots = array('q')
+    for event in events:
+        if not isinstance(event, Event):
+            raise TypeError(event)
+        roots.append(_flatten_into(event, base, top_left, top_right))
+
+    # nothing to join
+    if len(roots) < 2:
+        return Event.from_arrays(base, top_left, top_right).normalize() if roots else _EMPTY_EVENT
+
+    size = len(base)
+    out = (_buffer(size), _buffer(size), _buffer(size))
+    count = _join_many_arrays(base, top_left, top_right, roots, *out,
+                              _buffer(size), _buffer(size), _buffer(size), _buffer(6 * size))
+    _normalize_arrays(*out, count)
+    return Event.from_arrays(*out)
+
+
+def batch_leq(events_a: Sequence[Event], events_b: Sequence[Event]) -> List[bool]:
+    """
+    compare many pairs of events at once, same as [a <= b for a, b in zip(events_a, events_b)]
+    flattens the pairs that are not normalized yet into one set of arrays per side, so that they are compared in the
+    array kernels, since flattening costs more than comparing normal forms that are already cached
+    this only pays off with numba installed, without it this is just the list comprehension
+    """
+    if len(events_a) != len(events_b):
+        raise ValueError((len(events_a), len(events_b)))
+
+    if not _jit_array_kernels():
+        return [event_a <= event_b for event_a, event_b in zip(events_a, events_b)]
+
+    results = []
+    pending = []
+    arrays_a = (array('q'), array('q'), array('q'))
+    arrays_b = (array('q'), array('q'), array('q'))
+    roots_a, roots_b = array('q'), array('q')
+    for event_a, event_b in zip(events_a, events_b):
+        if not isinstance(event_a, Event):
+            raise TypeError(event_a)
+        if not isinstance(event_b, Event):
+            raise TypeError(event_b)
+
+        # both normal forms are cached, so compare them directly
+        if '_cached_normalize' in event_a.__dict__ and '_cached_normalize' in event_b.__dict__:
+            results.append(event_a <= event_b)
+            continue
+
+        # filled in below
+        pending.append(len(results))
+        results.append(False)
+        roots_a.append(_flatten_into(event_a, *arrays_a))
+        roots_b.append(_flatten_into(event_b, *arrays_b))
+
+    if pending:
+        # the right hand side must be normalized, and every root has its tops stored after it
+        _normalize_arrays(*arrays_b, len(arrays_b[0]))
+
+        out = _buffer(len(roots_a))
+        _leq_many_arrays(*arrays_a, roots_a, *arrays_b, roots_b, out, _buffer(3 * len(arrays_a[0])))
+        for index, result in zip(pending, out):
+            results[index] = bool(result)
+
+    return results
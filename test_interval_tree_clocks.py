@@ -0,0 +1,93 @@
+import functools
+import random
+import unittest
+
+from interval_tree_clocks import Event
+from interval_tree_clocks import _buffer
+from interval_tree_clocks import _join_arrays
+from interval_tree_clocks import _leq_arrays
+from interval_tree_clocks import _normalize_arrays
+from interval_tree_clocks import batch_join
+from interval_tree_clocks import batch_leq
+
+
+def random_event(rng: random.Random, depth: int = 4) -> Event:
+    top_left = random_event(rng, depth - 1) if depth and rng.random() < 0.5 else None
+    top_right = random_event(rng, depth - 1) if depth and rng.random() < 0.5 else None
+    return Event(rng.randint(0, 3), top_left or None, top_right or None)
+
+
+def structure(event):
+    # nested tuples, so that events can be compared structurally instead of with Event.__eq__
+    if event is None:
+        return None
+    return event.base, structure(event.top_left), structure(event.top_right)
+
+
+class TestArrays(unittest.TestCase):
+    def test_to_arrays_is_pre_order(self):
+        base, top_left, top_right = Event(1, Event(2), Event(0, None, Event(3))).to_arrays()
+        self.assertEqual(list(base), [1, 2, 0, 3])
+        self.assertEqual(list(top_left), [1, -1, -1, -1])
+        self.assertEqual(list(top_right), [2, -1, 3, -1])
+
+    def test_round_trip(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            event = random_event(rng)
+            self.assertEqual(structure(Event.from_arrays(*event.to_arrays())), structure(event))
+
+    def test_from_arrays_root(self):
+        event = Event(1, Event(2), Event(0, None, Event(3)))
+        self.assertEqual(structure(Event.from_arrays(*event.to_arrays(), root=2)), structure(event.top_right))
+
+    def test_kernels_match_events(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            event_a, event_b = random_event(rng), random_event(rng)
+            arrays_a, arrays_b = event_a.to_arrays(), event_b.to_arrays()
+
+            size = len(arrays_a[0]) + len(arrays_b[0])
+            out = (_buffer(size), _buffer(size), _buffer(size))
+            count = _join_arrays(*arrays_a, 0, *arrays_b, 0, *out, _buffer(6 * size))
+            _normalize_arrays(*out, count)
+            self.assertEqual(structure(Event.from_arrays(*out)), structure(event_a.join(event_b)))
+
+            _normalize_arrays(*arrays_b, len(arrays_b[0]))
+            self.assertEqual(structure(Event.from_arrays(*arrays_b)), structure(event_b.normalize()))
+            self.assertEqual(bool(_leq_arrays(*arrays_a, 0, *arrays_b, 0, _buffer(3 * len(arrays_a[0])))),
+                             event_a <= event_b)
+
+
+class TestBatch(unittest.TestCase):
+    def test_batch_join(self):
+        rng = random.Random(2)
+        for size in range(7):
+            for _ in range(50):
+                events = [random_event(rng) for _ in range(size)]
+                self.assertEqual(structure(batch_join(events)),
+                                 structure(functools.reduce(Event.join, events, Event()).normalize()))
+
+    def test_batch_leq(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            events_a = [random_event(rng) for _ in range(10)]
+            events_b = [random_event(rng) for _ in range(10)]
+
+            # some of the pairs already have their normal forms cached
+            for event in rng.sample(events_a + events_b, 10):
+                event.normalize()
+
+            self.assertEqual(batch_leq(events_a, events_b), [a <= b for a, b in zip(events_a, events_b)])
+
+    def test_batch_type_errors(self):
+        with self.assertRaises(TypeError):
+            batch_join([Event(1), 1])
+        with self.assertRaises(TypeError):
+            batch_leq([Event(1)], [1])
+        with self.assertRaises(ValueError):
+            batch_leq([Event(1)], [])
+
+
+if __name__ == '__main__':
+    unittest.main()